@@ -0,0 +1,28 @@
+from functools import lru_cache
+import chromadb
+from chromadb.config import Settings
+
+# HNSW index settings for the IPC collection. Embeddings are L2-normalized,
+# so inner product ranks exactly like cosine without the per-vector norm.
+IPC_COLLECTION_METADATA = {
+    "hnsw:space": "ip",
+    "hnsw:M": 32,
+    "hnsw:construction_ef": 200,
+    "hnsw:search_ef": 64
+}
+
+
+# Per-section fields live off-graph in this Parquet table, indexed by the
+# integer "id" stored in each vector's metadata. Only the fields needed for
+# where-clause filters are duplicated into Chroma, stored as strings.
+IPC_METADATA_FILE = "metadata.parquet"
+IPC_FILTER_FIELDS = ("section", "chapter")
+
+
+@lru_cache(maxsize=None)
+def get_persistent_client(persist_directory: str) -> chromadb.ClientAPI:
+    """Return an in-process Chroma client for the directory, with telemetry disabled."""
+    return chromadb.PersistentClient(
+        path=persist_directory,
+        settings=Settings(anonymized_telemetry=False)
+    )
@@ -1,16 +1,66 @@
 import os 
-import json
+import orjson
 from typing import List, Dict, Any
 from dotenv import load_dotenv 
-from langchain_chroma import Chroma, ChromaDB
-from langchain_huggingface import HuggingFaceEmbeddings
+from langchain_chroma import Chroma
+import pyarrow as pa
+import pyarrow.parquet as pq
+from legal_assistant.embeddings import create_embeddings
+from legal_assistant.tools.query_cache import get_ipc_query_cache
+from legal_assistant.database.chroma_db import (
+    IPC_COLLECTION_METADATA,
+    IPC_FILTER_FIELDS,
+    IPC_METADATA_FILE,
+    get_persistent_client
+)
 from langchain.schema import Document
 from tqdm import tqdm
 import shutil
 
+# Searchable text for each IPC section, filled from the metadata fields below
+_CONTENT_TMPL = (
+    "Section {section}: {section_title}\n\n"
+    "Description: {description}\n\n"
+    "Chapter: {chapter} - {chapter_title}\n\n"
+    "Offense Type: {offense_type}\n"
+    "Punishment: {punishment}\n"
+    "Bailable: {is_bailable}\n"
+    "Cognizable: {is_cognizable}\n"
+    "Triable By: {triable_by}\n"
+)
+
+# Metadata field -> key in ipc.json
+_FIELD_MAP = {
+    "section": "Section",
+    "section_title": "section_title",
+    "chapter": "chapter",
+    "chapter_title": "chapter_title",
+    "description": "section_desc",
+    "offense_type": "Offense_Type",
+    "punishment": "Punishment",
+    "is_bailable": "Is_Bailable",
+    "is_cognizable": "Is_Cognizable",
+    "triable_by": "Triable_By"
+}
+
+_FIELD_DEFAULTS = {
+    "is_bailable": "Not specified",
+    "is_cognizable": "Not specified",
+    "triable_by": "Not specified"
+}
+
+
+# Number of documents written to Chroma per insert call
+_INSERT_BATCH_SIZE = 256
+
+
+def _section_fields(section: Dict[str, Any]) -> Dict[str, Any]:
+    """Map a raw ipc.json entry onto the metadata field names."""
+    return {field: section.get(key, _FIELD_DEFAULTS.get(field, "")) for field, key in _FIELD_MAP.items()}
+
 
 class IPCVectorDBSetup:
-    """ Sets up Chroma Vector database with IPC sections using HuggingFace embeddinngs"""
+    """ Sets up Chroma Vector database with IPC sections using MiniLM embeddings"""
     
     def __init__(self):
         load_dotenv()
@@ -27,12 +77,8 @@ class IPCVectorDBSetup:
             raise ValueError("PERSIST_DIRECTORY not set in .env file.")
         
         #Initialize embeddings
-        print("Initializing HuggingFace Embeddings...")
-        self.embedding_function = HuggingFaceEmbeddings(
-            model_name="sentence-transformers/all-MiniLM-L6-v2",
-            model_kwargs={"device": "cpu"},
-            encode_kwargs={"normalize_embeddings": True}
-        )
+        print("Initializing Embeddings...")
+        self.embedding_function = create_embeddings(batch_size=64, show_progress_bar=True)
         
         
     def load_ipc_data(self) -> List[Dict[str, Any]]:
@@ -42,50 +88,43 @@ class IPCVectorDBSetup:
         if not os.path.exists(self.ipc_json_path):
             raise FileNotFoundError(f"IPC JSON file not found at {self.ipc_json_path}")
         
-        with open(self.ipc_json_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        with open(self.ipc_json_path, 'rb') as f:
+            data = orjson.loads(f.read())
         
-        print(f"Loaded {len(ipc_data)} IPC sections.")
+        print(f"Loaded {len(data)} IPC sections.")
         return data
     
     def prepare_documents(self, ipc_data: List[Dict[str, Any]]) -> List[Document]:
         """Convert IPC data to Langchain Document format."""
-        documents = []
-        
-        for section in tqdm(ipc_data, desc="Preparing documents"):
-            # Create searchable content
-            content = f"""
-            Section {section.get('Section', '')}: {section.get('Section_Title', '')}
-            
-            Description: {section.get('Description', '')}
-            
-            Chapter: {section.get('Chapter', '')} - {section.get('Chapter_Title', '')}
-            
-            Offense Type: {section.get('Offense_Type', '')}
-            Punishment: {section.get('Punishment', '')}
-            Bailable: {section.get('Is_Bailable', 'Not specified')}
-            Cognizable: {section.get('Is_Cognizable', 'Not specified')}
-            Triable By: {section.get('Triable_By', 'Not specified')}
-            """
-            
-            # Prepare metadata
-            metadata = {
-                "section": section.get('Section', ''),
-                "section_title": section.get('Section_Title', ''),
-                "chapter": section.get('Chapter', ''),
-                "chapter_title": section.get('Chapter_Title', ''),
-                "description": section.get('Description', ''),
-                "offense_type": section.get('Offense_Type', ''),
-                "punishment": section.get('Punishment', ''),
-                "is_bailable": section.get('Is_Bailable', ''),
-                "is_cognizable": section.get('Is_Cognizable', ''),
-                "triable_by": section.get('Triable_By', '')
-            }
-            
-            documents.append(Document(page_content=content, metadata=metadata))
+        sections = [_section_fields(section) for section in tqdm(ipc_data, desc="Preparing documents")]
+        
+        # Vector metadata holds the row id into the metadata table plus filter
+        # fields, stringified like the table since Chroma compares types strictly
+        documents = [
+            Document(
+                page_content=_CONTENT_TMPL.format_map(fields),
+                metadata={"id": i, **{field: str(fields[field]) for field in IPC_FILTER_FIELDS}}
+            )
+            for i, fields in enumerate(sections)
+        ]
         
         return documents
     
+    def prepare_metadata_table(self, ipc_data: List[Dict[str, Any]]) -> pa.Table:
+        """Build the column-oriented metadata table; row i matches vector id i."""
+        sections = [_section_fields(section) for section in ipc_data]
+        # Stored as strings: section numbers mix ints and values like '120A'
+        return pa.table({
+            field: [str(fields[field]) for fields in sections]
+            for field in _FIELD_MAP
+        })
+    
+    def save_metadata_table(self, table: pa.Table):
+        """Persist the metadata table next to the Chroma collection."""
+        path = os.path.join(self.persist_directory, IPC_METADATA_FILE)
+        pq.write_table(table, path)
+        print(f"Metadata table written to {path}")
+    
     def create_vector_db(self, documents: List[Document], reset: bool = False):
         """Create or update Chroma vector database."""
         
@@ -96,18 +135,44 @@ class IPCVectorDBSetup:
         
         print(f"Creating Chroma vector database at {self.persist_directory}...")
         
-        # Create vector store
-        vector_db = Chroma.from_documents(
-            documents=documents,
-            embedding=self.embedding_function,
+        texts = [doc.page_content for doc in documents]
+        metadatas = [doc.metadata for doc in documents]
+        ids = [str(metadata["id"]) for metadata in metadatas]
+        
+        # Embed all documents up front in batches instead of per document
+        print("Embedding documents...")
+        embeddings = self.embedding_function.embed_documents(texts)
+        
+        # Create vector store and insert the precomputed embeddings
+        client = get_persistent_client(self.persist_directory)
+        vector_db = Chroma(
+            client=client,
             collection_name=self.collection_name,
-            persist_directory=self.persist_directory
+            embedding_function=self.embedding_function,
+            collection_metadata=IPC_COLLECTION_METADATA
         )
+        collection = client.get_collection(self.collection_name)
+        
+        # Insert in mini-batches; ids are the metadata table row ids, so
+        # re-running without reset updates entries instead of duplicating them
+        for start in tqdm(range(0, len(texts), _INSERT_BATCH_SIZE), desc="Inserting documents"):
+            end = start + _INSERT_BATCH_SIZE
+            collection.upsert(
+                ids=ids[start:end],
+                documents=texts[start:end],
+                metadatas=metadatas[start:end],
+                embeddings=embeddings[start:end]
+            )
         
         print(f"Vector database created with {len(documents)} documents")
         return vector_db
     
-    def test_search(self, vector_db: Chroma):
+    def clear_query_cache(self):
+        """Drop cached IPC search results, which are stale once the index changes."""
+        get_ipc_query_cache(self.persist_directory).clear()
+        print("Cleared IPC query cache")
+    
+    def test_search(self, vector_db: Chroma, table: pa.Table):
         """Test the vector database with sample queries."""
         test_queries = [
             "murder and homicide",
@@ -125,8 +190,9 @@ class IPCVectorDBSetup:
             print(f"\nQuery: '{query}'")
             results = vector_db.similarity_search(query, k=3)
             
-            for i, doc in enumerate(results, 1):
-                print(f"  {i}. Section {doc.metadata['section']}: {doc.metadata['section_title']}")
+            rows = table.take([doc.metadata["id"] for doc in results]).to_pylist()
+            for i, row in enumerate(rows, 1):
+                print(f"  {i}. Section {row['section']}: {row['section_title']}")
     
     def setup(self, reset: bool = False):
         """Main setup method."""
@@ -140,8 +206,13 @@ class IPCVectorDBSetup:
             # Create vector database
             vector_db = self.create_vector_db(documents, reset=reset)
             
+            # Store section details off-graph
+            table = self.prepare_metadata_table(ipc_data)
+            self.save_metadata_table(table)
+            self.clear_query_cache()
+            
             # Test search functionality
-            self.test_search(vector_db)
+            self.test_search(vector_db, table)
             
             print("\n✅ Vector database setup complete!")
             print(f"Database location: {self.persist_directory}")
@@ -0,0 +1,181 @@
+import os
+import platform
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+import numpy as np
+import torch
+from dotenv import load_dotenv
+from langchain_core.embeddings import Embeddings
+from sentence_transformers import SentenceTransformer
+
+# Embedding model shared by the vector DB setup and the search tools
+MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+
+# Dynamically quantized int8 export shipped with the model (AVX512-VNNI kernels)
+ONNX_QINT8_FILE = "onnx/model_qint8_avx512_vnni.onnx"
+
+# Dynamically quantized int8 export for ARM64 CPUs
+ONNX_ARM64_QINT8_FILE = "onnx/model_qint8_arm64.onnx"
+
+# Static int8 OpenVINO export, fastest for short queries on Intel CPUs
+OPENVINO_QINT8_FILE = "openvino/openvino_model_qint8_quantized.xml"
+
+
+# Dimensionality of the distilled model2vec static model
+STATIC_PCA_DIMS = 256
+
+# Queries are short sentences; capping the length keeps them on the fast kernels
+QUERY_MAX_SEQ_LENGTH = 128
+
+
+@lru_cache(maxsize=1)
+def num_threads() -> int:
+    """
+    Intra-op threads for inference: EMBEDDING_NUM_THREADS (from the environment
+    or .env), falling back to the physical core count if unset or invalid.
+    """
+    load_dotenv()
+    default = max(1, (os.cpu_count() or 2) // 2)
+    try:
+        threads = int(os.getenv("EMBEDDING_NUM_THREADS", default))
+    except ValueError:
+        print(f"Invalid EMBEDDING_NUM_THREADS, using {default} threads.")
+        return default
+    return threads if threads > 0 else default
+
+
+@lru_cache(maxsize=1)
+def _pin_torch_threads() -> None:
+    """Pin PyTorch's pools once so concurrent tool calls don't oversubscribe the CPU."""
+    torch.set_num_threads(num_threads())
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        # Already fixed once inter-op work has started
+        pass
+
+
+def _backend_model_kwargs(backend: str, file_name: str) -> Dict[str, Any]:
+    """Model kwargs pinning the ONNX Runtime / OpenVINO thread pool to num_threads()."""
+    model_kwargs = {"file_name": file_name}
+    if backend == "onnx":
+        import onnxruntime
+        session_options = onnxruntime.SessionOptions()
+        session_options.intra_op_num_threads = num_threads()
+        session_options.inter_op_num_threads = 1
+        model_kwargs["session_options"] = session_options
+    elif backend == "openvino":
+        model_kwargs["ov_config"] = {"INFERENCE_NUM_THREADS": num_threads()}
+    return model_kwargs
+
+
+def _is_x86() -> bool:
+    """Check if running on an x86 CPU."""
+    return platform.machine().lower() in ("x86_64", "amd64", "i386", "i686")
+
+
+def default_backend() -> str:
+    """
+    Pick the inference backend: OpenVINO on x86, ONNX Runtime elsewhere (e.g. ARM).
+
+    The setup and the search tool both use this, so indexed documents and
+    queries are always embedded by the same quantized model.
+    """
+    return "openvino" if _is_x86() else "onnx"
+
+
+def backend_file(backend: str) -> str:
+    """Return the quantized model file for a backend on this CPU architecture."""
+    if backend == "openvino":
+        return OPENVINO_QINT8_FILE
+    return ONNX_QINT8_FILE if _is_x86() else ONNX_ARM64_QINT8_FILE
+
+
+class MiniLMEmbeddings(Embeddings):
+    """LangChain embeddings running a quantized int8 MiniLM (ONNX Runtime or OpenVINO)."""
+
+    def __init__(
+        self,
+        model_name: str = MODEL_NAME,
+        backend: Optional[str] = None,
+        file_name: Optional[str] = None,
+        batch_size: int = 64,
+        show_progress_bar: bool = False,
+        max_seq_length: Optional[int] = None
+    ):
+        _pin_torch_threads()
+        backend = backend or default_backend()
+        self.batch_size = batch_size
+        self.show_progress_bar = show_progress_bar
+        self.model = SentenceTransformer(
+            model_name,
+            device="cpu",
+            backend=backend,
+            model_kwargs=_backend_model_kwargs(backend, file_name or backend_file(backend))
+        )
+        if max_seq_length:
+            self.model.max_seq_length = max_seq_length
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed a list of documents into L2-normalized vectors, in batches."""
+        embeddings = self.model.encode(
+            texts,
+            batch_size=self.batch_size,
+            show_progress_bar=self.show_progress_bar,
+            normalize_embeddings=True,
+            convert_to_numpy=True
+        )
+        return embeddings.tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a single query string."""
+        return self.embed_documents([text])[0]
+
+
+class StaticEmbeddings(Embeddings):
+    """LangChain embeddings backed by a distilled model2vec static model (no transformer at query time)."""
+
+    def __init__(self, model_path: str, batch_size: int = 1024):
+        from model2vec import StaticModel
+        self.batch_size = batch_size
+        self.model = StaticModel.from_pretrained(model_path)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed a list of documents into L2-normalized vectors."""
+        embeddings = self.model.encode(texts, batch_size=self.batch_size)
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        return (embeddings / np.maximum(norms, 1e-12)).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a single query string."""
+        return self.embed_documents([text])[0]
+
+
+def distill_static_model(output_path: str, pca_dims: int = STATIC_PCA_DIMS) -> None:
+    """Distill MiniLM into a model2vec static model once, offline, and save it."""
+    from model2vec.distill import distill
+    model = distill(model_name=MODEL_NAME, pca_dims=pca_dims)
+    model.save_pretrained(output_path)
+
+
+def create_embeddings(**kwargs) -> Embeddings:
+    """
+    Build the embedding function for the IPC collection.
+
+    Uses the static model at STATIC_EMBEDDING_MODEL when that is set, otherwise
+    MiniLMEmbeddings(**kwargs). The setup and the search tool must agree, so
+    reindex after switching.
+    """
+    static_model_path = os.getenv("STATIC_EMBEDDING_MODEL")
+    if static_model_path:
+        return StaticEmbeddings(static_model_path)
+    return MiniLMEmbeddings(**kwargs)
+
+
+def embedder_id() -> str:
+    """Identify the model create_embeddings() builds, e.g. for query cache keys."""
+    static_model_path = os.getenv("STATIC_EMBEDDING_MODEL")
+    if static_model_path:
+        return f"model2vec:{static_model_path}"
+    backend = default_backend()
+    return f"{MODEL_NAME}:{backend_file(backend)}"
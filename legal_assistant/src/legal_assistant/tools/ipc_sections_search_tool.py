@@ -3,9 +3,53 @@ from typing import List, Dict, Any, Optional
 from dotenv import load_dotenv
 from crewai.tools import tool
 from langchain_chroma import Chroma
-from langchain_huggingface import HuggingFaceEmbeddings
+from langchain_core.embeddings import Embeddings
+import pyarrow as pa
+import pyarrow.parquet as pq
+from legal_assistant.embeddings import QUERY_MAX_SEQ_LENGTH, create_embeddings, embedder_id
+from legal_assistant.database.chroma_db import (
+    IPC_COLLECTION_METADATA,
+    IPC_METADATA_FILE,
+    get_persistent_client
+)
+from legal_assistant.tools.query_cache import (
+    IPC_CACHE_TTL,
+    cached_search,
+    get_ipc_query_cache,
+    query_cache_key
+)
 from pathlib import Path
 import json
+from functools import lru_cache
+
+
+@lru_cache(maxsize=1)
+def _get_embedder() -> Embeddings:
+    """Return the process-wide query embedder, loading it on first use."""
+    return create_embeddings(max_seq_length=QUERY_MAX_SEQ_LENGTH)
+
+
+@lru_cache(maxsize=1)
+def _get_vector_db(persist_dir: str, collection_name: str) -> Chroma:
+    """Return the process-wide handle to the persisted IPC collection."""
+    return Chroma(
+        client=get_persistent_client(persist_dir),
+        collection_name=collection_name,
+        embedding_function=_get_embedder(),
+        collection_metadata=IPC_COLLECTION_METADATA
+    )
+
+
+@lru_cache(maxsize=1)
+def _get_metadata_table(persist_dir: str) -> pa.Table:
+    """Return the IPC section metadata table, loaded once."""
+    return pq.read_table(Path(persist_dir) / IPC_METADATA_FILE)
+
+
+def _section_rows(persist_dir: str, docs) -> List[Dict[str, Any]]:
+    """Fetch the metadata rows for search results by their stored ids."""
+    ids = [int(doc.metadata["id"]) for doc in docs]
+    return _get_metadata_table(persist_dir).take(ids).to_pylist()
 
 
 @tool("IPC Sections Search Tool")
@@ -39,30 +83,26 @@ def search_ipc_sections(query: str, top_k: int = 3) -> str:
     collection_name = os.getenv("IPC_COLLECTION_NAME", "ipc_collection")
     
     try:
-        # Initialize embedding function
-        embedding_function = HuggingFaceEmbeddings(
-            model_name="sentence-transformers/all-MiniLM-L6-v2",
-            model_kwargs={'device': 'cpu'},
-            encode_kwargs={'normalize_embeddings': True}
-        )
-        
-        # Load vectorstore
-        vector_db = Chroma(
-            collection_name=collection_name,
-            persist_directory=persist_dir,
-            embedding_function=embedding_function
-        )
+        # Reuse the cached vectorstore (model weights and collection load once)
+        vector_db = _get_vector_db(persist_dir, collection_name)
         
-        # Perform similarity search
-        docs = vector_db.similarity_search(query, k=top_k)
+        # Perform similarity search, reusing cached results for repeated queries
+        cache = get_ipc_query_cache(persist_dir)
+        cache_key = query_cache_key("search_ipc_sections", collection_name, embedder_id(), query, top_k)
+        docs = cache.get(cache_key)
+        if docs is None:
+            # Embed once here and query the index by vector directly
+            query_vector = _get_embedder().embed_query(query)
+            docs = vector_db.similarity_search_by_vector(query_vector, k=top_k)
+            cache.set(cache_key, docs, expire=IPC_CACHE_TTL)
         
         if not docs:
             return "No relevant IPC sections found for the given query."
         
         # Format results for better readability
         results = []
-        for i, doc in enumerate(docs, 1):
-            metadata = doc.metadata
+        rows = _section_rows(persist_dir, docs)
+        for i, (doc, metadata) in enumerate(zip(docs, rows), 1):
             section_info = f"""
 **Result {i}:**
 📗 **Section {metadata.get('section', 'N/A')}**: {metadata.get('section_title', 'N/A')}
@@ -96,6 +136,10 @@ class IPCSectionSearcher:
         load_dotenv()
         self.vector_db = None
         self.embedding_function = None
+        self.cache = None
+        self.cache_ttl = IPC_CACHE_TTL
+        self.cache_namespace = None
+        self.persist_dir = None
         self._initialize()
     
     def _initialize(self):
@@ -104,18 +148,14 @@ class IPCSectionSearcher:
         if not persist_dir or not Path(persist_dir).exists():
             raise ValueError("Vector database not found. Please run setup first.")
         
-        self.embedding_function = HuggingFaceEmbeddings(
-            model_name="sentence-transformers/all-MiniLM-L6-v2",
-            model_kwargs={'device': 'cpu'},
-            encode_kwargs={'normalize_embeddings': True}
-        )
-        
-        self.vector_db = Chroma(
-            collection_name=os.getenv("IPC_COLLECTION_NAME", "ipc_collection"),
-            persist_directory=persist_dir,
-            embedding_function=self.embedding_function
-        )
+        collection_name = os.getenv("IPC_COLLECTION_NAME", "ipc_collection")
+        self.persist_dir = persist_dir
+        self.embedding_function = _get_embedder()
+        self.vector_db = _get_vector_db(persist_dir, collection_name)
+        self.cache = get_ipc_query_cache(persist_dir)
+        self.cache_namespace = (collection_name, embedder_id())
     
+    @cached_search
     def search(self, query: str, top_k: int = 3, filters: Optional[Dict] = None) -> List[Dict[str, Any]]:
         """
         Search with optional filters.
@@ -123,28 +163,31 @@ class IPCSectionSearcher:
         Args:
             query: Search query
             top_k: Number of results
-            filters: Optional filters like {'chapter': 'XVI'}
+            filters: Optional filters on 'section' or 'chapter', as strings,
+                like {'chapter': '16'} or {'section': '120A'}
         """
         where_clause = filters if filters else None
-        docs = self.vector_db.similarity_search(
-            query, 
+        query_vector = self.embedding_function.embed_query(query)
+        docs = self.vector_db.similarity_search_by_vector(
+            query_vector,
             k=top_k,
             filter=where_clause
         )
         
+        rows = _section_rows(self.persist_dir, docs)
         return [
             {
-                "section": doc.metadata.get("section"),
-                "section_title": doc.metadata.get("section_title"),
-                "chapter": doc.metadata.get("chapter"),
-                "chapter_title": doc.metadata.get("chapter_title"),
-                "description": doc.metadata.get("description"),
-                "punishment": doc.metadata.get("punishment"),
-                "is_bailable": doc.metadata.get("is_bailable"),
-                "is_cognizable": doc.metadata.get("is_cognizable"),
+                "section": row["section"],
+                "section_title": row["section_title"],
+                "chapter": row["chapter"],
+                "chapter_title": row["chapter_title"],
+                "description": row["description"],
+                "punishment": row["punishment"],
+                "is_bailable": row["is_bailable"],
+                "is_cognizable": row["is_cognizable"],
                 "content": doc.page_content
             }
-            for doc in docs
+            for doc, row in zip(docs, rows)
         ]
         
 
@@ -2,12 +2,20 @@ import os
 from typing import List, Dict, Any, Optional
 from dotenv import load_dotenv
 from crewai.tools import tool
-from langchain_chroma import Chroma
-from langchain_huggingface import HuggingFaceEmbeddings
 from pathlib import Path
 import json
 import re
+from concurrent.futures import ThreadPoolExecutor
+from threading import BoundedSemaphore
+from functools import lru_cache
+from urllib.parse import parse_qsl, urlencode, urlsplit
 from tavily import TavilyClient
+from legal_assistant.tools.query_cache import (
+    PRECEDENT_CACHE_TTL,
+    cached_search,
+    get_query_cache,
+    query_cache_key
+)
 
 # Trusted Indian legal domains
 LEGAL_SOURCES = [
@@ -23,28 +31,103 @@ LEGAL_SOURCES = [
     "scconline.com"
 ]
 
+_LEGAL_HOSTS = frozenset(LEGAL_SOURCES)
+
+# Query parameters ignored when de-duplicating URLs (besides utm_*)
+_TRACKING_PARAMS = frozenset({"fbclid", "gclid", "msclkid"})
+
+# Court tiers searched in parallel by search_similar_cases
+COURT_LEVELS = ("supreme", "high", "district")
+
+# Caps in-flight Tavily requests across the whole process to respect rate limits
+_TAVILY_SEMAPHORE = BoundedSemaphore(3)
+
+_COURT_DOMAINS = {
+    "supreme": ["sci.gov.in", "indiankanoon.org/search/?formInput=doctypes:sc"],
+    "high": ["hcservices.ecourts.gov.in", "indiankanoon.org/search/?formInput=doctypes:hc"],
+    "district": ["judgments.ecourts.gov.in"],
+    "all": LEGAL_SOURCES
+}
+
+# Domain-restricted query prefix per court level, built once
+_COURT_SITE_QUERIES = {
+    level: " OR ".join(f"site:{domain}" for domain in domains[:3])
+    for level, domains in _COURT_DOMAINS.items()
+}
+
+# Common citation patterns, combined into one pattern compiled once
+_CITATION_RE = re.compile(
+    r"(?:\(\d{4}\)\s*\d+\s*SCC\s*\d+"        # (2024) 5 SCC 123
+    r"|AIR\s*\d{4}\s*SC\s*\d+"                # AIR 2024 SC 123
+    r"|\d{4}\s*\(\d+\)\s*\w+\s*\d+"           # 2024 (5) ALT 123
+    r"|W\.P\.\s*No\.\s*\d+\s*of\s*\d{4})",    # W.P. No. 123 of 2024
+    re.IGNORECASE
+)
+
+
+@lru_cache(maxsize=1)
+def _get_tavily_client(api_key: str) -> TavilyClient:
+    """Return a Tavily client shared by the tool and all searcher instances."""
+    return TavilyClient(api_key=api_key)
+
+
+def _legal_source(url: str) -> Optional[str]:
+    """Return the trusted legal domain a URL's host belongs to, if any."""
+    if not url:
+        return None
+    labels = (urlsplit(url).hostname or "").split(".")
+    # Check the host and each parent domain against the trusted set
+    for i in range(len(labels) - 1):
+        domain = ".".join(labels[i:])
+        if domain in _LEGAL_HOSTS:
+            return domain
+    return None
+
+
+def _get_precedent_cache():
+    """On-disk cache for Tavily precedent searches."""
+    return get_query_cache(os.getenv("PRECEDENT_CACHE_DIR", ".precedent_cache"))
+
+
 def _is_legal_source(url: str) -> bool:
     """Check if a URL belongs to one of the trusted legal domains."""
-    if not url:
-        return False
-    return any(domain in url.lower() for domain in LEGAL_SOURCES)
+    return _legal_source(url) is not None
+
+
+def _is_tracking_param(name: str) -> bool:
+    """Check if a query parameter only tracks the click, not the document."""
+    name = name.lower()
+    return name.startswith("utm_") or name in _TRACKING_PARAMS
+
+
+def _canonical_url(url: str) -> str:
+    """
+    Normalize a URL for de-duplication.
+
+    Drops the fragment, tracking parameters and trailing slash and lower-cases
+    the scheme and host. Other query parameters are kept (sorted), since
+    ecourts links identify the judgment in the query (e.g. ?file_path=...).
+    """
+    parts = urlsplit(url)
+    query = urlencode(sorted(
+        (name, value)
+        for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not _is_tracking_param(name)
+    ))
+    parts = parts._replace(
+        scheme=parts.scheme.lower(),
+        netloc=parts.netloc.lower(),
+        path=parts.path.rstrip("/"),
+        query=query,
+        fragment=""
+    )
+    return parts.geturl()
 
 
 def _extract_case_citation(text: str) -> Optional[str]:
     """Extract case citation from text."""
-    # Common citation patterns
-    patterns = [
-        r'\(\d{4}\)\s*\d+\s*SCC\s*\d+',  # (2024) 5 SCC 123
-        r'AIR\s*\d{4}\s*SC\s*\d+',        # AIR 2024 SC 123
-        r'\d{4}\s*\(\d+\)\s*\w+\s*\d+',   # 2024 (5) ALT 123
-        r'W\.P\.\s*No\.\s*\d+\s*of\s*\d{4}',  # W.P. No. 123 of 2024
-    ]
-    
-    for pattern in patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
-        if match:
-            return match.group()
-    return None
+    match = _CITATION_RE.search(text)
+    return match.group() if match else None
 
 
 @tool("Legal Precedent Search Tool")
@@ -76,7 +159,7 @@ def search_legal_precedents(
         return "❌ Error: 'TAVILY_API_KEY' not found in .env file"
     
     try:
-        client = TavilyClient(api_key=api_key)
+        client = _get_tavily_client(api_key)
         
         # Build comprehensive search query
         search_terms = [query]
@@ -89,36 +172,41 @@ def search_legal_precedents(
         # Add legal keywords for better results
         search_terms.append("judgment precedent case law India")
         
-        # Construct the full query
-        full_query = " ".join(search_terms)
-        
-        # Search with domain restrictions
-        site_query = " OR ".join([f"site:{domain}" for domain in LEGAL_SOURCES[:3]])
-        search_query = f"({site_query}) {full_query}"
+        # Construct the full query; include_domains restricts the sources, so
+        # no inline site: operators that would dilute semantic ranking
+        search_query = " ".join(search_terms)
         
-        # Perform search
-        response = client.search(
-            query=search_query,
-            max_results=max_results * 2,  # Get extra results for filtering
-            search_depth="advanced",
-            include_domains=LEGAL_SOURCES
-        )
-        
-        raw_results = response.get("results", [])
+        # Perform search, reusing cached results for repeated queries
+        cache = _get_precedent_cache()
+        cache_key = query_cache_key("search_legal_precedents", search_query, max_results)
+        raw_results = cache.get(cache_key)
+        if raw_results is None:
+            with _TAVILY_SEMAPHORE:
+                response = client.search(
+                    query=search_query,
+                    max_results=max_results * 2,  # Get extra results for filtering
+                    search_depth="advanced",
+                    include_domains=LEGAL_SOURCES
+                )
+            raw_results = response.get("results", [])
+            cache.set(cache_key, raw_results, expire=PRECEDENT_CACHE_TTL)
         
         # Filter and process results
         legal_results = []
-        seen_titles = set()
+        seen_urls = set()
         
         for item in raw_results:
-            if not _is_legal_source(item.get("url", "")):
+            source = _legal_source(item.get("url", ""))
+            if source is None:
                 continue
             
-            title = item.get("title", "")
-            # Skip duplicates
-            if title in seen_titles:
+            # Skip duplicates (same judgment returned under different titles)
+            url_key = _canonical_url(item["url"])
+            if url_key in seen_urls:
                 continue
-            seen_titles.add(title)
+            seen_urls.add(url_key)
+            
+            title = item.get("title", "")
             
             # Extract case citation if present
             citation = _extract_case_citation(title) or _extract_case_citation(item.get("content", ""))
@@ -128,7 +216,7 @@ def search_legal_precedents(
                 "citation": citation,
                 "summary": item.get("content", "")[:500],  # Limit summary length
                 "url": item.get("url"),
-                "source": next((domain for domain in LEGAL_SOURCES if domain in item.get("url", "")), "Unknown")
+                "source": source
             })
             
             if len(legal_results) >= max_results:
@@ -170,9 +258,11 @@ class LegalPrecedentSearcher:
         self.api_key = os.getenv("TAVILY_API_KEY")
         if not self.api_key:
             raise ValueError("TAVILY_API_KEY not found in .env file")
-        self.client = TavilyClient(api_key=self.api_key)
-        self.cache = {}
+        self.client = _get_tavily_client(self.api_key)
+        self.cache = _get_precedent_cache()
+        self.cache_ttl = PRECEDENT_CACHE_TTL
     
+    @cached_search
     def search_by_court(
         self, 
         query: str, 
@@ -187,24 +277,16 @@ class LegalPrecedentSearcher:
             court_level: 'supreme', 'high', 'district', or 'all'
             max_results: Maximum results to return
         """
-        court_domains = {
-            "supreme": ["sci.gov.in", "indiankanoon.org/search/?formInput=doctypes:sc"],
-            "high": ["hcservices.ecourts.gov.in", "indiankanoon.org/search/?formInput=doctypes:hc"],
-            "district": ["judgments.ecourts.gov.in"],
-            "all": LEGAL_SOURCES
-        }
-        
-        domains = court_domains.get(court_level, LEGAL_SOURCES)
-        
-        # Build domain-specific query
-        site_query = " OR ".join([f"site:{domain}" for domain in domains[:3]])
+        # Domain-specific query
+        site_query = _COURT_SITE_QUERIES.get(court_level, _COURT_SITE_QUERIES["all"])
         search_query = f"({site_query}) {query} judgment India"
         
-        response = self.client.search(
-            query=search_query,
-            max_results=max_results * 2,
-            search_depth="advanced"
-        )
+        with _TAVILY_SEMAPHORE:
+            response = self.client.search(
+                query=search_query,
+                max_results=max_results * 2,
+                search_depth="advanced"
+            )
         
         results = []
         for item in response.get("results", []):
@@ -237,7 +319,25 @@ class LegalPrecedentSearcher:
         
         query = " ".join(query_parts) + " similar cases precedent India"
         
-        return self.search_by_court(query, "all", max_results)
+        # One request per court tier, run concurrently so latency is the slowest tier
+        with ThreadPoolExecutor(max_workers=len(COURT_LEVELS)) as executor:
+            tier_results = executor.map(
+                lambda level: self.search_by_court(query, level, max_results),
+                COURT_LEVELS
+            )
+            merged = [result for results in tier_results for result in results]
+        
+        # Merge tiers, dropping judgments returned by more than one tier
+        unique_results = []
+        seen_urls = set()
+        for result in sorted(merged, key=lambda r: r["relevance_score"], reverse=True):
+            url_key = _canonical_url(result["url"])
+            if url_key in seen_urls:
+                continue
+            seen_urls.add(url_key)
+            unique_results.append(result)
+        
+        return unique_results[:max_results]
 
 
 # Testing functions (commented out for production)
@@ -0,0 +1,65 @@
+import hashlib
+import inspect
+import os
+from functools import lru_cache, wraps
+from typing import Any, Callable, Optional
+from diskcache import Cache
+
+# Tavily results change over time; the IPC corpus does not
+PRECEDENT_CACHE_TTL = 24 * 60 * 60
+IPC_CACHE_TTL: Optional[int] = None
+
+# Subdirectory of the vector DB's persist directory holding the IPC query cache
+IPC_CACHE_DIR = "query_cache"
+
+
+@lru_cache(maxsize=None)
+def get_query_cache(directory: str) -> Cache:
+    """Return the on-disk query cache stored in the given directory."""
+    return Cache(directory)
+
+
+def get_ipc_query_cache(persist_directory: str) -> Cache:
+    """Return the IPC query cache kept next to the vector DB."""
+    return get_query_cache(os.path.join(persist_directory, IPC_CACHE_DIR))
+
+
+def _normalize(value: Any) -> Any:
+    """Make dicts order-independent (recursively) so equal filters share a key."""
+    if isinstance(value, dict):
+        return tuple(sorted(((repr(k), _normalize(v)) for k, v in value.items())))
+    if isinstance(value, (list, tuple)):
+        return tuple(_normalize(v) for v in value)
+    return value
+
+
+def query_cache_key(*parts: Any) -> str:
+    """Build a compact content-hash key from the query, top-k and filters."""
+    return hashlib.blake2b(repr(_normalize(parts)).encode(), digest_size=16).hexdigest()
+
+
+def cached_search(method: Callable) -> Callable:
+    """
+    Cache a searcher method's results in ``self.cache`` for ``self.cache_ttl`` seconds.
+
+    Arguments are bound against the signature so positional and keyword
+    calls share the same cache entry. An optional ``self.cache_namespace``
+    (e.g. the index and embedder in use) is folded into the key.
+    """
+    signature = inspect.signature(method)
+
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        bound = signature.bind(self, *args, **kwargs)
+        bound.apply_defaults()
+        arguments = list(bound.arguments.items())[1:]  # Skip self
+        namespace = getattr(self, "cache_namespace", None)
+        key = query_cache_key(method.__qualname__, namespace, arguments)
+
+        result = self.cache.get(key)
+        if result is None:
+            result = method(self, *args, **kwargs)
+            self.cache.set(key, result, expire=self.cache_ttl)
+        return result
+
+    return wrapper